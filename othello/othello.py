@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import datetime
+import collections, datetime
 import pygame,math,random, time
 
 
@@ -155,6 +155,11 @@ class Board:
 				pygame.draw.rect(screen, self.HIGHLIGHT_CELL_COLOR, self.rect, 3)
 
 
+		def draw_score(self, screen, text):
+			# center the rendered score text on the cell
+			pos = self.midpoint[0]-text.get_width()//2, self.midpoint[1]-text.get_height()//2
+			screen.blit(text, pos)
+
 		def does_intersect(self, pos):
 			return (pos[0] > self.rect[0] and pos[0] < self.rect[0]+self.rect[2]) \
 				and (pos[1] > self.rect[1] and pos[1] < self.rect[1]+self.rect[3])
@@ -171,7 +176,7 @@ class Board:
 		self.setup_board(offset, cell_size)
 		# TODO - random ", draw as bunny 
 		# assign "bunnies" double point cells
-		random.seed(datetime.datetime.now())
+		random.seed(datetime.datetime.now().timestamp())
 		for i in range(0,5):
 			x,y =  random.randint(0,self.DIMEN-1), random.randint(0, self.DIMEN-1) 
 			self.grid[x][y].bunny = self.img
@@ -438,11 +443,13 @@ class Board:
 
 
 class AI:
-	def __init__(self, player, board):
+	def __init__(self, player, board, analyzer=None):
 		self.player = player
 		# reference to the board
 		self.board = board
-		random.seed(datetime.datetime.now())
+		# if given, search for the best move instead of picking at random
+		self.analyzer = analyzer
+		random.seed(datetime.datetime.now().timestamp())
 
 	def get_move(self):
 		'''
@@ -452,16 +459,161 @@ class AI:
 		move = Board.GAME_OVER
 		if not self.board.check_game_over():
 			move = Board.NO_MOVES # does not own any cells!
-			get_all_moves = self.board.get_all_moves(self.player)
-			#shuffle the cells
-			if get_all_moves:
-				moves = []
-				while len(get_all_moves) > 0:
-					moves.append(get_all_moves.pop(random.randint(0, len(get_all_moves)-1)))
-				move = moves[random.randint(0, len(moves)-1)]
+			if self.analyzer:
+				# search one ply deeper than hints, so the positions left for the
+				# player are already in the cache at hint depth
+				best = self.analyzer.get_hints(self.board, self.player, 1, self.analyzer.depth+1)
+				if best:
+					move = best[0][0]
+			else:
+				get_all_moves = self.board.get_all_moves(self.player)
+				#shuffle the cells
+				if get_all_moves:
+					moves = []
+					while len(get_all_moves) > 0:
+						moves.append(get_all_moves.pop(random.randint(0, len(get_all_moves)-1)))
+					move = moves[random.randint(0, len(moves)-1)]
 		return move
 
 
+# ---------------------------- Analyzer Class ------------------------------------
+class Analyzer:
+	'''
+	Analyzer - Ranks moves with a fixed depth negamax search.
+			Positions are plain tuples (owners, values, player) with one entry per cell
+			in row order, so searching never touches the board or its cells.
+			Every searched position is kept in an LRU cache, hints, repeated clicks and
+			the AI all reuse each other's work.
+	'''
+	DEPTH = 2 # plies searched for a hint
+	CACHE_SIZE = 20000 # positions kept in the cache
+	DIRECTIONS = [(di,dj) for di in range(-1,2) for dj in range(-1,2) if (di,dj) != (0,0)]
+
+	def __init__(self, depth=DEPTH, cache_size=CACHE_SIZE):
+		self.depth = depth
+		self.cache_size = cache_size
+		self.cache = collections.OrderedDict() # position -> (depth, ranked moves)
+
+	@staticmethod
+	def get_position(board, player):
+		owners = tuple(cell.owner for row in board.grid for cell in row)
+		values = tuple(cell.value() for row in board.grid for cell in row)
+		return (owners, values, player)
+
+	def get_hints(self, board, player, count, depth=None):
+		'''
+			returns up to count best moves as [((cell_from, cell_to), score)], best first.
+			score is the expected lead in points for player after depth plies
+		'''
+		if depth == None:
+			depth = self.depth
+		hints = []
+		for (src, dst), score in self.analyze(self.get_position(board, player), depth)[:count]:
+			cell_from = board.grid[src[0]][src[1]]
+			cell_to = board.grid[dst[0]][dst[1]]
+			hints.append(((cell_from, cell_to), score))
+		return hints
+
+	def analyze(self, position, depth):
+		'''
+			returns all moves of position as [((from, to), score)] sorted best first,
+			from and to are grid indices
+		'''
+		entry = self.cache.get(position)
+		if entry and entry[0] >= depth:
+			self.cache.move_to_end(position)
+			return entry[1]
+		owners, values, player = position
+		opponent = Board.toggle_player(player)
+		ranked = []
+		for move in self.get_moves(owners, player):
+			child = (self.apply_move(owners, player, move[1]), values, opponent)
+			ranked.append((move, -self.search(child, depth-1)))
+		ranked.sort(key=lambda m: m[1], reverse=True)
+		self.cache[position] = (depth, ranked)
+		self.cache.move_to_end(position)
+		if len(self.cache) > self.cache_size:
+			self.cache.popitem(last=False)
+		return ranked
+
+	def search(self, position, depth):
+		'''
+			value of position for the player to move
+		'''
+		if depth <= 0:
+			return self.evaluate(position)
+		ranked = self.analyze(position, depth)
+		if ranked:
+			return ranked[0][1]
+		# no moves, the turn passes if the opponent has any
+		owners, values, player = position
+		opponent = Board.toggle_player(player)
+		if self.get_moves(owners, opponent):
+			return -self.search((owners, values, opponent), depth-1)
+		return self.evaluate(position)
+
+	@staticmethod
+	def evaluate(position):
+		owners, values, player = position
+		score = 0
+		for owner, value in zip(owners, values):
+			if owner == player:
+				score += value
+			elif owner != Board.PLAYER_NEITHER:
+				score -= value
+		return score
+
+	@classmethod
+	def get_lines(cls, owners, player, to):
+		'''
+			yields (direction, end) for each line of opponent pieces running from the
+			empty cell to up to a piece owned by player
+		'''
+		dimen = Board.DIMEN
+		i, j = to
+		for di, dj in cls.DIRECTIONS:
+			ni, nj = i+di, j+dj
+			jumped = False
+			while 0 <= ni < dimen and 0 <= nj < dimen:
+				owner = owners[ni*dimen+nj]
+				if owner == player:
+					if jumped:
+						yield (di, dj), (ni, nj)
+					break
+				elif owner == Board.PLAYER_NEITHER:
+					break
+				jumped = True
+				ni, nj = ni+di, nj+dj
+
+	@classmethod
+	def get_moves(cls, owners, player):
+		'''
+			same moves as Board.get_all_moves, one per destination cell since
+			Board.move flips every line that ends there
+		'''
+		dimen = Board.DIMEN
+		moves = []
+		for index, owner in enumerate(owners):
+			if owner == Board.PLAYER_NEITHER:
+				to = divmod(index, dimen)
+				for direction, end in cls.get_lines(owners, player, to):
+					moves.append((end, to))
+					break
+		return moves
+
+	@classmethod
+	def apply_move(cls, owners, player, to):
+		dimen = Board.DIMEN
+		owners = list(owners)
+		for (di, dj), end in list(cls.get_lines(owners, player, to)):
+			ni, nj = to[0]+di, to[1]+dj
+			while (ni, nj) != end:
+				owners[ni*dimen+nj] = player
+				ni, nj = ni+di, nj+dj
+		owners[to[0]*dimen+to[1]] = player
+		return tuple(owners)
+
+
 # ---------------------------- Menu Class ------------------------------------
 class Menu:
 	TEXT_COLOR = [0,55,250]
@@ -547,22 +699,29 @@ class ScoreBoard:
 		pygame.draw.circle(screen, color, midpoint,self.radius,0)
 		pygame.draw.circle(screen, Board.Cell.HIGHLIGHT_PIECE_COLOR, midpoint,self.radius,0)
 
+# window and board size and position settings
+BG_COLOR = [5,5,32]
+BORDER = 2
+SCREEN_SIZE = [550, 650]
+BOARD_OFFSET = (BORDER, SCREEN_SIZE[1]//15)
+HINT_COUNT = 3 # moves shown by Show Hint
+
 # ---------------------------- MMain Entry Point ------------------------------------
 def main():
-	# window and board size and position settings
-	BG_COLOR = [5,5,32]
-	border = 2
-	size = [550, 650]
-	offset = (border, size[1]//15)
+	border = BORDER
+	size = SCREEN_SIZE
+	offset = BOARD_OFFSET
 	# board variables
 	board = None
 	ai = None 
+	analyzer = None
 	score_board = None
 	# game and gui state variables
 	player = None
 	selected_cell = None 
 	current_player = None
 	winner = None
+	show_hints = False
 	exit = False
 	draw_board =False
 	start_new_game = False
@@ -597,9 +756,11 @@ def main():
 			board = Board( offset, (size[0], size[0])  ) 
 			score_board = ScoreBoard((offset[0], offset[1]+size[0]))
 			player = Board.PLAYER_BLACK
-			ai = AI(Board.PLAYER_WHITE, board) 
+			analyzer = Analyzer()
+			ai = AI(Board.PLAYER_WHITE, board, analyzer) 
 			selected_cell = None 
 			winner = None
+			show_hints = False
 			show_start_menu = False
 			start_new_game = False
 
@@ -638,6 +799,7 @@ def main():
 									# add the piece to the cell and flip all pieces in between
 									board.move(current_player, cell)
 									current_player = board.toggle_player(current_player)
+									show_hints = False
 								# unselect current piece if not selecting new piece
 								if cell and cell.owner == current_player:
 									selected_cell = cell 
@@ -653,13 +815,19 @@ def main():
 			#draw board
 			board.draw(screen)
 			# if cell is celected highlight current piece, and any potential moves
-			#if draw move hints by selecting a random cell that has a move
+			#if draw move hints show the best moves and their scores until the player moves
 			screen.blit(hint_text, (hint_button[0],hint_button[1]))
 			if mouse_clicked:
 				if (mouse_pos[0] > hint_button[0] and mouse_pos[0] < hint_button[0]+hint_button[2]) \
 					and (mouse_pos[1] > hint_button[1] and mouse_pos[1] < hint_button[1]+hint_button[3]): 
-					all_moves = board.get_all_moves(current_player)
-					selected_cell = all_moves[random.randint(0, len(all_moves)-1)][0]
+					show_hints = True
+			if show_hints and current_player == player:
+				# searched once per position, every other frame is a cache hit
+				for (cell_from, cell_to), score in analyzer.get_hints(board, current_player, HINT_COUNT):
+					cell_from.draw_highlight(screen, True)
+					cell_to.draw_highlight(screen)
+					score_text = hint_font.render('%+d' % score, True, Menu.TEXT_COLOR, Menu.BUTTON_COLOR)
+					cell_to.draw_score(screen, score_text)
 			if selected_cell:
 				# highlight the piece
 				potential_moves = board.get_moves(selected_cell)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+'''
+record - Headless recorder for Othello/Reversi game videos.
+		Self-plays (or replays) games under the SDL dummy driver and renders every
+		frame, flip animations included, to an offscreen surface. Frames are streamed
+		through a bounded queue to a writer thread that pipes raw RGB to ffmpeg or
+		saves a PNG sequence. Games render as fast as the CPU allows, one per process.
+
+		python3 record.py othello.mp4
+		python3 record.py games/game.mp4 --games 8 --jobs 4
+		python3 record.py frames/ --replay othello.moves
+'''
+import argparse, multiprocessing, os, queue, subprocess, threading
+
+# must be set before pygame is initialised
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from othello import AI, Board, ScoreBoard, BG_COLOR, SCREEN_SIZE, BOARD_OFFSET
+
+FPS = 10 # same rate as the interactive game loop
+QUEUE_SIZE = 32 # frames buffered between renderer and writer
+END_FRAMES = 2*FPS # hold the final position for a moment
+MAX_FRAMES = 20000 # guard against a game that never ends
+PASS = 'pass'
+BUNNY = 'bunny'
+
+
+# ---------------------------- FrameWriter Class ------------------------------------
+class FrameWriter(threading.Thread):
+	'''
+	FrameWriter - Consumes raw RGB frames from a bounded queue on its own thread.
+			Each frame is copied exactly once, out of the render surface, and that
+			buffer is handed to the output as is.
+	'''
+	def __init__(self, size, queue_size=QUEUE_SIZE):
+		threading.Thread.__init__(self, daemon=True)
+		self.size = size
+		self.frames = queue.Queue(queue_size)
+		self.count = 0
+		self.error = None
+		self.start()
+
+	def write(self, surface):
+		'''
+			copy the surface and queue it, blocks while the queue is full
+		'''
+		if self.error:
+			raise self.error
+		self.frames.put(pygame.image.tostring(surface, 'RGB'))
+
+	def close(self):
+		self.frames.put(None)
+		self.join()
+		self.finish()
+		if self.error:
+			raise self.error
+
+	def run(self):
+		while True:
+			frame = self.frames.get()
+			if frame is None:
+				break
+			# keep draining after a failure so the renderer never blocks on put
+			if self.error is None:
+				try:
+					self.write_frame(frame)
+					self.count += 1
+				except Exception as e:
+					self.error = e
+
+	def write_frame(self, frame):
+		raise NotImplementedError
+
+	def finish(self):
+		pass
+
+
+class VideoWriter(FrameWriter):
+	'''
+	VideoWriter - Pipes raw RGB frames to an ffmpeg subprocess.
+	'''
+	def __init__(self, path, size, fps=FPS, queue_size=QUEUE_SIZE):
+		command = ['ffmpeg', '-y', '-loglevel', 'error',
+				'-f', 'rawvideo', '-pix_fmt', 'rgb24',
+				'-s', '%dx%d' % tuple(size), '-r', str(fps), '-i', '-',
+				'-pix_fmt', 'yuv420p', path]
+		self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+		FrameWriter.__init__(self, size, queue_size)
+
+	def write_frame(self, frame):
+		self.process.stdin.write(frame)
+
+	def finish(self):
+		try:
+			self.process.stdin.close()
+		except BrokenPipeError:
+			pass
+		if self.process.wait() != 0 and self.error is None:
+			self.error = RuntimeError('ffmpeg exited with code ' + str(self.process.returncode))
+
+
+class PngWriter(FrameWriter):
+	'''
+	PngWriter - Saves every frame as a numbered PNG in a directory.
+	'''
+	def __init__(self, path, size, queue_size=QUEUE_SIZE):
+		self.path = path
+		os.makedirs(path, exist_ok=True)
+		FrameWriter.__init__(self, size, queue_size)
+
+	def write_frame(self, frame):
+		# wrap the queued buffer without copying it again
+		image = pygame.image.frombuffer(frame, self.size, 'RGB')
+		pygame.image.save(image, os.path.join(self.path, 'frame%05d.png' % self.count))
+
+
+def open_writer(path, size, fps=FPS):
+	'''
+		a path ending in a separator (or an existing directory) is a PNG sequence,
+		anything else is a video file encoded by ffmpeg
+	'''
+	if path.endswith(os.sep) or os.path.isdir(path):
+		return PngWriter(path, size)
+	return VideoWriter(path, size, fps)
+
+
+# ---------------------------- Move files ------------------------------------
+def load_moves(path):
+	'''
+		a "bunny i j" header line for each double point cell, then one turn per line,
+		either "i j" for the destination cell or "pass".
+		Returns (bunnies, moves), each move paired with its "file:line" for errors
+	'''
+	bunnies = []
+	moves = []
+	with open(path) as f:
+		for number, line in enumerate(f, 1):
+			where = '%s:%d' % (path, number)
+			words = line.split()
+			if not words:
+				continue
+			if words[0] == BUNNY and len(words) == 3 and not moves:
+				bunnies.append((int(words[1]), int(words[2])))
+			elif words == [PASS]:
+				moves.append((where, PASS))
+			elif len(words) == 2:
+				moves.append((where, (int(words[0]), int(words[1]))))
+			else:
+				raise ValueError(where + ': cannot read move ' + repr(line.strip()))
+	return bunnies, moves
+
+def save_moves(path, bunnies, moves):
+	with open(path, 'w') as f:
+		for bunny in bunnies:
+			f.write(BUNNY + ' %d %d\n' % bunny)
+		for move in moves:
+			if move == PASS:
+				f.write(PASS + '\n')
+			else:
+				f.write('%d %d\n' % move)
+
+
+# ---------------------------- Recording ------------------------------------
+def record_game(path, replay=None, fps=FPS):
+	'''
+		play a single game to completion, writing every frame to path.
+		replay : (bunnies, moves) from load_moves, otherwise two AIs play each other
+		Returns (bunnies, moves) for save_moves
+	'''
+	pygame.init()
+	screen = pygame.Surface(SCREEN_SIZE)
+	offset = BOARD_OFFSET
+	board = Board(offset, (SCREEN_SIZE[0], SCREEN_SIZE[0]))
+	score_board = ScoreBoard((offset[0], offset[1]+SCREEN_SIZE[0]))
+	ais = {Board.PLAYER_BLACK: AI(Board.PLAYER_BLACK, board),
+			Board.PLAYER_WHITE: AI(Board.PLAYER_WHITE, board)}
+	if replay is not None:
+		# put the double point cells back where they were when the game was recorded
+		bunnies, replay = replay
+		for row in board.grid:
+			for cell in row:
+				cell.bunny = None
+		for i, j in bunnies:
+			board.grid[i][j].bunny = board.img
+	bunnies = [cell.grid_pos for row in board.grid for cell in row if cell.bunny]
+	current_player = Board.PLAYER_BLACK
+	moves = []
+	game_over = False
+	writer = open_writer(path, SCREEN_SIZE, fps)
+	try:
+		end_frames = END_FRAMES
+		frame = 0
+		while end_frames > 0 and frame < MAX_FRAMES:
+			# same turn logic as main(), minus the human player
+			if not game_over:
+				game_over = board.check_game_over() or (replay is not None and len(moves) == len(replay))
+			if game_over:
+				end_frames -= 1
+			elif not board.is_waiting():
+				if replay is None:
+					move = ais[current_player].get_move()
+					if move != Board.NO_MOVES:
+						board.move(current_player, move[1])
+						moves.append(move[1].grid_pos)
+					else:
+						moves.append(PASS)
+				else:
+					where, move = replay[len(moves)]
+					legal = [cell_to.grid_pos for cell_from, cell_to in board.get_all_moves(current_player) or []]
+					if move == PASS:
+						if legal:
+							raise ValueError(where + ': pass while moves are available')
+					elif move in legal:
+						i, j = move
+						board.move(current_player, board.grid[i][j])
+					else:
+						raise ValueError(where + ': illegal move %d %d' % move)
+					moves.append(move)
+				current_player = board.toggle_player(current_player)
+			screen.fill(BG_COLOR)
+			board.draw(screen)
+			score_board.draw(screen, board, current_player)
+			writer.write(screen)
+			frame += 1
+	finally:
+		writer.close()
+		pygame.quit()
+	return bunnies, moves
+
+
+def _record_job(job):
+	path, moves_path, replay = job
+	bunnies, moves = record_game(path, replay)
+	if moves_path:
+		save_moves(moves_path, bunnies, moves)
+	return path
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Record Othello games to video without a display.')
+	parser.add_argument('output', help='video file (encoded with ffmpeg) or directory/ for a PNG sequence')
+	parser.add_argument('--games', type=int, default=1, help='number of games to record')
+	parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='games rendered in parallel')
+	parser.add_argument('--replay', help='moves file to replay instead of self-play')
+	args = parser.parse_args()
+
+	replay = load_moves(args.replay) if args.replay else None
+	# resolve paths before moving into the asset directory
+	output = os.path.abspath(args.output) + (os.sep if args.output.endswith(os.sep) else '')
+	jobs = []
+	for i in range(args.games):
+		root, ext = os.path.splitext(output.rstrip(os.sep))
+		if args.games > 1:
+			root += '_' + str(i)
+		path = root + ext + (os.sep if output.endswith(os.sep) else '')
+		jobs.append((path, None if replay else root + '.moves', replay))
+	# Board loads its images relative to the working directory
+	os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+	if len(jobs) == 1:
+		print(_record_job(jobs[0]))
+	else:
+		with multiprocessing.get_context('spawn').Pool(max(1, min(args.jobs, len(jobs)))) as pool:
+			for path in pool.imap_unordered(_record_job, jobs):
+				print(path, flush=True)
+
+
+if __name__ == '__main__':
+	main()